@@ -1,16 +1,53 @@
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 from matplotlib import pyplot as plt
 from flask import Flask, request, jsonify
 import osmnx as ox
 import networkx as nx
+import numpy as np
 from pymongo import MongoClient
 from shapely.geometry import shape
 import geopandas as gpd
 from shapely.geometry import LineString
 
-app = Flask(__name__)
+from alternative_routes import alternative_routes as find_alternatives
+from graph_preprocessing import astar_route, build_csr, preprocess_graph
+from request_batching import RouteBatcher
+from route_optimization import optimize_route as solve_route
 
-# Global graph variable to store the reconstructed graph
+app = Flask(__name__)
+# Micro-batching of concurrent /shortest_path requests: a longer window means
+# fewer, larger snap batches (throughput) but more added latency per request
+app.config["ROUTE_BATCH_WINDOW_MS"] = float(os.environ.get("ROUTE_BATCH_WINDOW_MS", 5))
+app.config["ROUTE_BATCH_MAX_SIZE"] = int(os.environ.get("ROUTE_BATCH_MAX_SIZE", 64))
+# Seconds a /shortest_path request waits for the batcher before giving up
+app.config["ROUTE_TIMEOUT"] = float(os.environ.get("ROUTE_TIMEOUT", 30))
+# Limits of /optimize_route: number of stops and maximum solver time (seconds).
+# The time budget only covers the solver. The distance table runs one full
+# Dijkstra per stop, about 15 ms per stop on a 90k-node city graph (4.4 s for
+# 300 stops), plus the same again to stitch the legs. Raise the stop cap only
+# if those response times are acceptable; the response reports table_time.
+app.config["OPTIMIZE_MAX_STOPS"] = int(os.environ.get("OPTIMIZE_MAX_STOPS", 100))
+app.config["OPTIMIZE_TIME_BUDGET"] = float(os.environ.get("OPTIMIZE_TIME_BUDGET", 1.0))
+# Maximum number of routes returned by /alternative_routes
+app.config["MAX_ALTERNATIVES"] = int(os.environ.get("MAX_ALTERNATIVES", 5))
+
+# Global graph variable to store the reconstructed graph (largest strongly
+# connected component only)
 G = None
+# Compressed search graph, its chain index and the preprocessing statistics
+G_search = None
+chain_index = None
+graph_stats = None
+# Worker queue coalescing and batching concurrent route requests
+route_batcher = None
+# Sparse adjacency matrix of G for batched searches, its transpose for
+# backward searches, and the row <-> node maps
+G_matrix = None
+G_matrix_reverse = None
+matrix_nodes = None
+matrix_index = None
 
 
 def connect_to_mongodb():
@@ -48,15 +85,66 @@ def reconstruct_graph(nodes, edges):
     return G
 
 
+def build_route_batcher(G, G_search, chain_index):
+    """Create a RouteBatcher snapping onto G and searching G_search."""
+    return RouteBatcher(
+        snap_fn=lambda X, Y: ox.distance.nearest_nodes(G, X=X, Y=Y),
+        route_fn=lambda u, v: astar_route(G, G_search, chain_index, u, v),
+        window_ms=app.config["ROUTE_BATCH_WINDOW_MS"],
+        max_batch=app.config["ROUTE_BATCH_MAX_SIZE"],
+    )
+
+
 @app.route("/initialize", methods=["POST"])
 def initialize_graph():
     """API to initialize the graph by loading data from MongoDB."""
-    global G
+    global G, G_search, chain_index, graph_stats, route_batcher
+    global G_matrix, G_matrix_reverse, matrix_nodes, matrix_index
     try:
         db = connect_to_mongodb()
         nodes, edges = load_data_from_mongodb(db)
-        G = reconstruct_graph(nodes, edges)
-        return jsonify({"message": "Graph initialized successfully!"}), 200
+
+        # Build everything into locals first; the globals are only replaced
+        # once every step succeeded, so a failure leaves the old state intact
+        new_G, new_G_search, new_chain_index, new_stats = preprocess_graph(
+            reconstruct_graph(nodes, edges)
+        )
+        new_matrix, new_matrix_nodes, new_matrix_index = build_csr(new_G)
+        new_matrix_reverse = new_matrix.T.tocsr()
+        new_batcher = build_route_batcher(new_G, new_G_search, new_chain_index)
+
+        old_batcher = route_batcher
+        # Unpacking assigns left to right; G goes last because it is the
+        # "initialized" guard checked by every endpoint
+        (
+            G_search,
+            chain_index,
+            graph_stats,
+            G_matrix,
+            G_matrix_reverse,
+            matrix_nodes,
+            matrix_index,
+            route_batcher,
+            G,
+        ) = (
+            new_G_search,
+            new_chain_index,
+            new_stats,
+            new_matrix,
+            new_matrix_reverse,
+            new_matrix_nodes,
+            new_matrix_index,
+            new_batcher,
+            new_G,
+        )
+        # Close the old batcher only after the new one is swapped in, so
+        # requests never pick up a batcher that is already shut down
+        if old_batcher is not None:
+            old_batcher.close()
+        return (
+            jsonify({"message": "Graph initialized successfully!", "stats": graph_stats}),
+            200,
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -72,41 +160,128 @@ def shortest_path():
         )
 
     try:
-        data = request.json
-        origin_coords = (10.882311, 106.782409)
-        destination_coords = (10.759388, 106.667391)
+        data = request.get_json(silent=True) or {}
+
+        # Snapping and the A* search on the compressed graph run in the batcher;
+        # identical concurrent requests share a single computation
+        try:
+            if not isinstance(data, dict):
+                raise TypeError("Request body must be a JSON object.")
+            origin_coords = tuple(data.get("origin", (10.882311, 106.782409)))
+            destination_coords = tuple(
+                data.get("destination", (10.759388, 106.667391))
+            )
+            future = route_batcher.submit(origin_coords, destination_coords)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        except RuntimeError as e:
+            # The graph was re-initialized while this request was starting
+            return jsonify({"error": str(e)}), 503
+        try:
+            length, path = future.result(timeout=app.config["ROUTE_TIMEOUT"])
+        except FutureTimeoutError:
+            return jsonify({"error": "Route computation timed out."}), 504
+
+        return jsonify({"path": path, "length": length}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Find nearest nodes to origin and destination
-        origin_node = ox.distance.nearest_nodes(
-            G, X=origin_coords[1], Y=origin_coords[0]
+
+@app.route("/alternative_routes", methods=["POST"])
+def alternative_routes():
+    """API to find up to k diverse routes between two coordinates."""
+    global G
+    if G is None:
+        return (
+            jsonify({"error": "Graph not initialized. Please call /initialize first."}),
+            400,
         )
-        destination_node = ox.distance.nearest_nodes(
-            G, X=destination_coords[1], Y=destination_coords[0]
+
+    try:
+        data = request.json
+        origin_coords = data["origin"]
+        destination_coords = data["destination"]
+        k = int(data.get("k", 3))
+        if k < 1:
+            return jsonify({"error": "k must be at least 1."}), 400
+        k = min(k, app.config["MAX_ALTERNATIVES"])
+
+        origin_node, destination_node = np.asarray(
+            ox.distance.nearest_nodes(
+                G,
+                X=[origin_coords[1], destination_coords[1]],
+                Y=[origin_coords[0], destination_coords[0]],
+            )
+        ).tolist()
+
+        # The A* length bounds both search trees of the via-node selection
+        shortest_length, _ = astar_route(
+            G, G_search, chain_index, origin_node, destination_node
+        )
+        routes = find_alternatives(
+            G_matrix,
+            G_matrix_reverse,
+            matrix_nodes,
+            matrix_index,
+            origin_node,
+            destination_node,
+            shortest_length,
+            k=k,
         )
 
-        # Define the heuristic: straight-line (Euclidean) distance from current node to destination
-        def heuristic(u, v):
-            (lat_u, lon_u) = G.nodes[u]["y"], G.nodes[u]["x"]
-            (lat_v, lon_v) = G.nodes[v]["y"], G.nodes[v]["x"]
-            return ox.distance.great_circle_vec(
-                lat_u, lon_u, lat_v, lon_v
-            )  # straight-line distance in meters
+        return jsonify({"routes": routes}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Calculate shortest path using A* algorithm
-        path = nx.astar_path(
-            G,
-            source=origin_node,
-            target=destination_node,
-            weight="length",
-            heuristic=heuristic,
+
+@app.route("/optimize_route", methods=["POST"])
+def optimize_route():
+    """API to order many stops into a short tour starting at a depot."""
+    global G
+    if G is None:
+        return (
+            jsonify({"error": "Graph not initialized. Please call /initialize first."}),
+            400,
         )
 
-        # # Calculate shortest path using Dijkstra's algorithm
-        # path = nx.dijkstra_path(
-        #     G, source=origin_node, target=destination_node, weight="length"
-        # )
+    try:
+        data = request.json
+        depot_coords = data["depot"]
+        stops_coords = data["stops"]
+        if not stops_coords:
+            return jsonify({"error": "At least one stop is required."}), 400
+        if len(stops_coords) > app.config["OPTIMIZE_MAX_STOPS"]:
+            return (
+                jsonify(
+                    {
+                        "error": f"At most {app.config['OPTIMIZE_MAX_STOPS']} stops are supported."
+                    }
+                ),
+                400,
+            )
+
+        return_to_depot = data.get("return_to_depot", True)
+        if not isinstance(return_to_depot, bool):
+            return jsonify({"error": "return_to_depot must be a boolean."}), 400
+
+        # Snap the depot and all stops in one vectorized lookup
+        lats, lons = zip(*[depot_coords, *stops_coords])
+        snapped = np.asarray(ox.distance.nearest_nodes(G, X=lons, Y=lats)).tolist()
+
+        result = solve_route(
+            G_matrix,
+            matrix_nodes,
+            matrix_index,
+            depot=snapped[0],
+            stops=snapped[1:],
+            return_to_depot=return_to_depot,
+            time_budget=min(
+                float(data.get("time_budget", app.config["OPTIMIZE_TIME_BUDGET"])),
+                app.config["OPTIMIZE_TIME_BUDGET"],
+            ),
+        )
 
-        return jsonify({"path": path}), 200
+        return jsonify(result), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,175 @@
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+
+def _tree_path(predecessors, root, node):
+    """Rows from `root` to `node` in a shortest-path tree, root first."""
+    rows = [node]
+    while node != root:
+        node = predecessors[node]
+        rows.append(node)
+    rows.reverse()
+    return rows
+
+
+def _follow_to_end(pointers):
+    """Resolve every node to the fixed point of `pointers` by pointer jumping."""
+    while True:
+        jumped = pointers[pointers]
+        if np.array_equal(jumped, pointers):
+            return pointers
+        pointers = jumped
+
+
+def _plateaus(candidates, dist_forward, pred_forward, pred_backward):
+    """
+    Group candidate nodes into plateaus, maximal paths lying in both the
+    forward and the backward tree. All nodes of a plateau give the same via
+    route, and long plateaus mark good alternatives.
+
+    Returns the first node of every plateau and the plateau lengths.
+    """
+    n = len(dist_forward)
+    in_candidates = np.zeros(n, dtype=bool)
+    in_candidates[candidates] = True
+
+    # v -> w is a plateau edge when it belongs to both trees
+    nxt = pred_backward[candidates]
+    is_plateau = nxt >= 0
+    is_plateau[is_plateau] = in_candidates[nxt[is_plateau]] & (
+        pred_forward[nxt[is_plateau]] == candidates[is_plateau]
+    )
+
+    forward_pointers = np.arange(n)
+    backward_pointers = np.arange(n)
+    forward_pointers[candidates[is_plateau]] = nxt[is_plateau]
+    backward_pointers[nxt[is_plateau]] = candidates[is_plateau]
+
+    starts = _follow_to_end(backward_pointers)[candidates]
+    ends = _follow_to_end(forward_pointers)[candidates]
+    starts, first = np.unique(starts, return_index=True)
+    return starts, dist_forward[ends[first]] - dist_forward[starts]
+
+
+def _is_locally_optimal(matrix, rows, cumulative, via_position, radius):
+    """
+    T-test: the subpath spanning `radius` on both sides of the via node must
+    itself be a shortest path, otherwise the route takes a pointless detour.
+    """
+    via_distance = cumulative[via_position]
+    start = np.searchsorted(cumulative, via_distance - radius, side="right") - 1
+    end = np.searchsorted(cumulative, via_distance + radius, side="left")
+    start = max(start, 0)
+    end = min(end, len(rows) - 1)
+
+    segment = cumulative[end] - cumulative[start]
+    dist = dijkstra(
+        matrix, directed=True, indices=rows[start], limit=segment + 1e-6
+    )
+    return dist[rows[end]] >= segment - 1e-6
+
+
+def alternative_routes(
+    matrix,
+    reverse_matrix,
+    nodes,
+    node_index,
+    source,
+    target,
+    shortest_length,
+    k=3,
+    stretch=0.25,
+    max_sharing=0.8,
+    local_optimality=0.25,
+    max_candidates=50,
+):
+    """
+    Find up to `k` diverse routes from `source` to `target` with via-node
+    alternatives.
+
+    One forward tree from the source and one backward tree to the target
+    (over `reverse_matrix`, the transpose of `matrix`) are grown up to
+    (1 + stretch) * `shortest_length`. Every node v reached by both is a
+    candidate route s -> v -> t. Candidates are grouped into plateaus and
+    tried shortest and longest-plateau first; one is accepted when at most
+    `max_sharing` of the shortest length is shared with routes already
+    accepted and it passes a local optimality test over `local_optimality`
+    of the shortest length around v.
+
+    Returns a list of {"path", "length"} dicts, shortest first.
+    """
+    s, t = node_index[source], node_index[target]
+    limit = (1 + stretch) * shortest_length + 1e-6
+
+    dist_forward, pred_forward = dijkstra(
+        matrix, directed=True, indices=s, return_predecessors=True, limit=limit
+    )
+    dist_backward, pred_backward = dijkstra(
+        reverse_matrix, directed=True, indices=t, return_predecessors=True, limit=limit
+    )
+
+    d_star = dist_forward[t]
+    if np.isinf(d_star):
+        raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+    def via_route(v):
+        """Rows of s -> v -> t and the length of each of its edges."""
+        head = _tree_path(pred_forward, s, v)
+        tail = _tree_path(pred_backward, t, v)[::-1]
+        rows = head + tail[1:]
+        lengths = np.concatenate(
+            (np.diff(dist_forward[head]), -np.diff(dist_backward[tail]))
+        )
+        return rows, lengths, len(head) - 1
+
+    shortest, lengths, _ = via_route(t)
+    routes = [(shortest, float(lengths.sum()))]
+    selected_edges = set(zip(shortest[:-1], shortest[1:]))
+
+    tried = np.zeros(matrix.shape[0], dtype=bool)
+    tried[shortest] = True
+
+    total = dist_forward + dist_backward
+    candidates, plateau_lengths = _plateaus(
+        np.flatnonzero(total <= (1 + stretch) * d_star),
+        dist_forward,
+        pred_forward,
+        pred_backward,
+    )
+    order = np.argsort(2 * total[candidates] - plateau_lengths, kind="stable")
+    candidates = candidates[order]
+
+    tested = 0
+    for v in candidates:
+        if len(routes) >= k or tested >= max_candidates:
+            break
+        if tried[v]:
+            continue
+        tested += 1
+
+        rows, lengths, via_position = via_route(v)
+        tried[rows] = True
+        if len(set(rows)) < len(rows):
+            continue  # Forward and backward halves cross, not a simple path
+
+        edges = list(zip(rows[:-1], rows[1:]))
+        sharing = sum(
+            length for edge, length in zip(edges, lengths) if edge in selected_edges
+        )
+        if sharing > max_sharing * d_star:
+            continue
+
+        cumulative = np.concatenate(([0], np.cumsum(lengths)))
+        if not _is_locally_optimal(
+            matrix, rows, cumulative, via_position, local_optimality * d_star
+        ):
+            continue
+
+        routes.append((rows, float(cumulative[-1])))
+        selected_edges.update(edges)
+
+    return [
+        {"path": [nodes[row] for row in rows], "length": length}
+        for rows, length in routes
+    ]
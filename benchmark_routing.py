@@ -0,0 +1,176 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+import numpy as np
+import osmnx as ox
+
+import Flask_server
+from alternative_routes import alternative_routes
+from Flask_server import connect_to_mongodb, load_data_from_mongodb, reconstruct_graph
+from graph_preprocessing import astar_route, build_csr, preprocess_graph
+from route_optimization import distance_table, optimize_route, tour_length
+
+
+def benchmark_preprocessing(G, G_search, chain_index, num_queries=200, seed=42):
+    """Compare A* on the full graph with A* on the compressed graph."""
+
+    def heuristic(u, v):
+        (lat_u, lon_u) = G.nodes[u]["y"], G.nodes[u]["x"]
+        (lat_v, lon_v) = G.nodes[v]["y"], G.nodes[v]["x"]
+        return ox.distance.great_circle_vec(lat_u, lon_u, lat_v, lon_v)
+
+    rng = random.Random(seed)
+    nodes = list(G.nodes)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(num_queries)]
+
+    full_times, compressed_times = [], []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = nx.astar_path(G, source, target, weight="length", heuristic=heuristic)
+        full_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        length, compressed_path = astar_route(G, G_search, chain_index, source, target)
+        compressed_times.append(time.perf_counter() - start)
+
+        expected = nx.path_weight(G, path, weight="length")
+        assert abs(length - expected) < 1e-6, (source, target, length, expected)
+
+    full_ms = statistics.mean(full_times) * 1000
+    compressed_ms = statistics.mean(compressed_times) * 1000
+    print(f"A* on full graph:       {full_ms:.2f} ms/query")
+    print(f"A* on compressed graph: {compressed_ms:.2f} ms/query")
+    print(f"Speedup: {full_ms / compressed_ms:.2f}x over {num_queries} queries")
+
+
+def benchmark_concurrency(
+    G,
+    G_search,
+    chain_index,
+    windows_ms=(0, 2, 5, 10),
+    num_requests=500,
+    concurrency=32,
+    distinct_pairs=50,
+    seed=42,
+):
+    """Measure /shortest_path p50/p99 latency and throughput under concurrent load."""
+    Flask_server.G = G
+    Flask_server.G_search = G_search
+    Flask_server.chain_index = chain_index
+    client = Flask_server.app.test_client()
+
+    rng = random.Random(seed)
+    nodes = list(G.nodes)
+    pairs = []
+    for _ in range(distinct_pairs):
+        u, v = rng.choice(nodes), rng.choice(nodes)
+        pairs.append(
+            {
+                "origin": [G.nodes[u]["y"], G.nodes[u]["x"]],
+                "destination": [G.nodes[v]["y"], G.nodes[v]["x"]],
+            }
+        )
+    # Bursty traffic: many requests repeat the same few pairs
+    payloads = [rng.choice(pairs) for _ in range(num_requests)]
+
+    def send(payload):
+        start = time.perf_counter()
+        response = client.post("/shortest_path", json=payload)
+        assert response.status_code == 200, response.get_json()
+        return time.perf_counter() - start
+
+    for window_ms in windows_ms:
+        Flask_server.app.config["ROUTE_BATCH_WINDOW_MS"] = window_ms
+        Flask_server.route_batcher = Flask_server.build_route_batcher(
+            G, G_search, chain_index
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(send, payloads))
+        elapsed = time.perf_counter() - start
+        Flask_server.route_batcher.close()
+
+        stats = Flask_server.route_batcher.stats
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(
+            f"window={window_ms:>4} ms: p50={p50:.1f} ms p99={p99:.1f} ms "
+            f"throughput={num_requests / elapsed:.0f} req/s "
+            f"batches={stats['batches']} coalesced={stats['coalesced']}"
+        )
+
+
+def benchmark_optimize_route(
+    G, stop_counts=(50, 100, 300), time_budgets=(0.05, 0.25, 1.0, 5.0), seed=42
+):
+    """Report tour length against solve time for /optimize_route."""
+    matrix, nodes, node_index = build_csr(G)
+    rng = random.Random(seed)
+
+    for num_stops in stop_counts:
+        depot, *stops = rng.sample(nodes, num_stops + 1)
+        table = distance_table(matrix, [node_index[n] for n in [depot, *stops]])
+        naive_length = tour_length(list(range(num_stops + 1)), table)
+        print(f"{num_stops} stops, unordered tour: {naive_length:.0f} m")
+
+        for time_budget in time_budgets:
+            result = optimize_route(
+                matrix, nodes, node_index, depot, stops, time_budget=time_budget
+            )
+            print(
+                f"  budget={time_budget:>5} s: table={result['table_time'] * 1000:.0f} ms "
+                f"solve={result['solve_time'] * 1000:.0f} ms "
+                f"insertion={result['initial_length']:.0f} m "
+                f"final={result['length']:.0f} m "
+                f"({result['length'] / naive_length:.1%} of unordered)"
+            )
+
+
+def benchmark_alternatives(G, G_search, chain_index, num_queries=100, k=3, seed=42):
+    """Compare /alternative_routes latency with a single A* query."""
+    matrix, nodes, node_index = build_csr(G)
+    reverse_matrix = matrix.T.tocsr()
+    rng = random.Random(seed)
+
+    single_times, alternative_times, found = [], [], []
+    for _ in range(num_queries):
+        source, target = rng.choice(nodes), rng.choice(nodes)
+
+        start = time.perf_counter()
+        length, _ = astar_route(G, G_search, chain_index, source, target)
+        single_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        routes = alternative_routes(
+            matrix, reverse_matrix, nodes, node_index, source, target, length, k=k
+        )
+        alternative_times.append(time.perf_counter() - start)
+        found.append(len(routes))
+
+    single_p50, single_p99 = np.percentile(single_times, [50, 99]) * 1000
+    alt_p50, alt_p99 = np.percentile(alternative_times, [50, 99]) * 1000
+    print(f"Single A* query:     p50={single_p50:.1f} ms p99={single_p99:.1f} ms")
+    print(f"Alternatives (k={k}): p50={alt_p50:.1f} ms p99={alt_p99:.1f} ms (on top of A*)")
+    print(f"Routes found per query: {statistics.mean(found):.2f}")
+
+
+def main():
+    db = connect_to_mongodb()
+    nodes, edges = load_data_from_mongodb(db)
+    G = reconstruct_graph(nodes, edges)
+
+    G, G_search, chain_index, stats = preprocess_graph(G)
+    for stage, counts in stats.items():
+        print(f"{stage:>12}: {counts['nodes']} nodes, {counts['edges']} edges")
+
+    benchmark_preprocessing(G, G_search, chain_index)
+    benchmark_concurrency(G, G_search, chain_index)
+    benchmark_optimize_route(G)
+    benchmark_alternatives(G, G_search, chain_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import heapq
+import math
+
+import networkx as nx
+import numpy as np
+import osmnx as ox
+from scipy.sparse import csr_matrix
+
+
+def keep_largest_scc(G):
+    """Return a copy of G restricted to its largest strongly connected component."""
+    largest = max(nx.strongly_connected_components(G), key=len)
+    return G.subgraph(largest).copy()
+
+
+def _is_chain_node(G, node):
+    """Check whether a node only passes traffic through (degree-2 in either direction)."""
+    preds = set(G.predecessors(node))
+    succs = set(G.successors(node))
+    if node in preds or node in succs:
+        return False
+
+    # One-way street: a -> node -> b
+    if G.in_degree(node) == 1 and G.out_degree(node) == 1:
+        return preds != succs
+
+    # Two-way street: a <-> node <-> b
+    if G.in_degree(node) == 2 and G.out_degree(node) == 2:
+        return preds == succs and len(preds) == 2
+
+    return False
+
+
+def _next_chain_edge(G, node, previous):
+    """Return the single edge (v, key, data) leaving a chain node away from `previous`."""
+    for v, keydict in G.succ[node].items():
+        if v == previous and len(G.succ[node]) > 1:
+            continue
+        for key, data in keydict.items():
+            return v, key, data
+
+
+def compress_degree2_chains(G):
+    """
+    Collapse chains of degree-2 nodes into single shortcut edges.
+
+    Every shortcut edge keeps the interior nodes it replaces in its `via`
+    attribute, and the distance from its start node to each of them in
+    `via_offsets`, so routes can be expanded back to full node paths.
+    """
+    chain_nodes = {node for node in G.nodes if _is_chain_node(G, node)}
+    anchors = [node for node in G.nodes if node not in chain_nodes]
+    visited = set()
+
+    H = nx.MultiDiGraph()
+    H.graph.update(G.graph)
+
+    def promote(node):
+        chain_nodes.discard(node)
+        visited.add(node)
+        H.add_node(node, **G.nodes[node])
+
+    def walk_chain(u, v, data):
+        length = data.get("length", 0)
+        via, via_offsets = [], []
+        previous, current = u, v
+        while current in chain_nodes and current != u:
+            visited.add(current)
+            via.append(current)
+            via_offsets.append(length)
+            nxt, _, nxt_data = _next_chain_edge(G, current, previous)
+            length += nxt_data.get("length", 0)
+            previous, current = current, nxt
+        return current, length, via, via_offsets
+
+    def walk_chains_from(u):
+        promoted = []
+        for v, keydict in G.succ[u].items():
+            for data in keydict.values():
+                current, length, via, via_offsets = walk_chain(u, v, data)
+                if current == u and via:
+                    # Loop road leaving and re-entering u: split it at its
+                    # middle node so its interior nodes stay routable
+                    middle = via[len(via) // 2]
+                    promote(middle)
+                    promoted.append(middle)
+                    current, length, via, via_offsets = walk_chain(u, v, data)
+                if current == u:
+                    continue  # Self-loop edge, never part of a shortest path
+                H.add_edge(
+                    u,
+                    current,
+                    length=length,
+                    via=tuple(via),
+                    via_offsets=tuple(via_offsets),
+                )
+        for node in promoted:
+            walk_chains_from(node)
+
+    for node in anchors:
+        H.add_node(node, **G.nodes[node])
+    for node in anchors:
+        walk_chains_from(node)
+
+    # Rings made only of chain nodes have no anchor to start from; promote a
+    # node of each ring and let the loop handling above split the rest.
+    for node in G.nodes:
+        if node in chain_nodes and node not in visited:
+            promote(node)
+            walk_chains_from(node)
+
+    return H
+
+
+def build_chain_index(H):
+    """Map every interior chain node to the shortcut edges (u, v, key, position) containing it."""
+    index = {}
+    for u, v, key, via in H.edges(keys=True, data="via"):
+        for position, node in enumerate(via):
+            index.setdefault(node, []).append((u, v, key, position))
+    return index
+
+
+def preprocess_graph(G):
+    """
+    Prune G to its largest strongly connected component and compress it.
+
+    Returns the pruned graph (used for snapping, visualization and GeoJSON
+    export), the compressed search graph, its chain index and a dict of
+    node/edge counts before and after each stage.
+    """
+    stats = {"original": {"nodes": len(G), "edges": G.number_of_edges()}}
+
+    G = keep_largest_scc(G)
+    stats["largest_scc"] = {"nodes": len(G), "edges": G.number_of_edges()}
+
+    H = compress_degree2_chains(G)
+    stats["compressed"] = {"nodes": len(H), "edges": H.number_of_edges()}
+
+    print(
+        "Graph preprocessed: "
+        f"{stats['original']['nodes']} -> {stats['compressed']['nodes']} nodes, "
+        f"{stats['original']['edges']} -> {stats['compressed']['edges']} edges"
+    )
+    return G, H, build_chain_index(H), stats
+
+
+def build_csr(G):
+    """
+    Build a sparse adjacency matrix of G weighted by edge length, for batched
+    scipy.sparse.csgraph searches. Parallel edges keep their shortest length.
+
+    Returns the matrix, the list of node ids by row and the reverse mapping.
+    """
+    nodes = list(G.nodes)
+    node_index = {node: i for i, node in enumerate(nodes)}
+
+    lengths = {}
+    for u, v, length in G.edges(data="length", default=0):
+        if u == v:
+            continue
+        key = (node_index[u], node_index[v])
+        if key not in lengths or length < lengths[key]:
+            lengths[key] = length
+
+    rows, cols = np.array(list(lengths.keys()), dtype=np.int64).reshape(-1, 2).T
+    # Zero lengths would be dropped as missing edges by sparse operations
+    data = np.maximum(np.fromiter(lengths.values(), dtype=float), 1e-9)
+    matrix = csr_matrix((data, (rows, cols)), shape=(len(nodes), len(nodes)))
+    return matrix, nodes, node_index
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * ox.distance.EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _source_seeds(H, chain_index, source):
+    """Anchor nodes reachable from `source` along its chain, with offset and interior nodes."""
+    if source in H:
+        return {source: (0, [source])}
+    seeds = {}
+    for u, v, key, position in chain_index[source]:
+        data = H[u][v][key]
+        offset = data["length"] - data["via_offsets"][position]
+        prefix = [source, *data["via"][position + 1 :], v]
+        if v not in seeds or offset < seeds[v][0]:
+            seeds[v] = (offset, prefix)
+    return seeds
+
+
+def _target_goals(H, chain_index, target):
+    """Anchor nodes from which `target` is reached along its chain, with remaining cost."""
+    if target in H:
+        return {target: (0, [])}
+    goals = {}
+    for u, v, key, position in chain_index[target]:
+        data = H[u][v][key]
+        remaining = data["via_offsets"][position]
+        suffix = [*data["via"][: position + 1]]
+        if u not in goals or remaining < goals[u][0]:
+            goals[u] = (remaining, suffix)
+    return goals
+
+
+def _same_chain_path(H, chain_index, source, target):
+    """Direct path when source and target lie on the same shortcut edge in travel order."""
+    if source in H or target in H:
+        return None
+    best = None
+    target_positions = {(u, v, key): pos for u, v, key, pos in chain_index[target]}
+    for u, v, key, position in chain_index[source]:
+        target_position = target_positions.get((u, v, key))
+        if target_position is None or target_position <= position:
+            continue
+        data = H[u][v][key]
+        cost = data["via_offsets"][target_position] - data["via_offsets"][position]
+        if best is None or cost < best[0]:
+            best = (cost, list(data["via"][position : target_position + 1]))
+    return best
+
+
+def expand_edge(H, u, v, key):
+    """Return the interior nodes of shortcut edge (u, v, key) followed by v."""
+    return [*H[u][v][key]["via"], v]
+
+
+def astar_route(G, H, chain_index, source, target):
+    """
+    Find the shortest path between two nodes of the pruned graph G using A*
+    on its compressed graph H.
+
+    `source` and `target` may be interior chain nodes; they are attached to
+    the anchors at the ends of their chains. Returns (length, full node path).
+    """
+    if source == target:
+        return 0, [source]
+
+    target_lat, target_lon = G.nodes[target]["y"], G.nodes[target]["x"]
+
+    # Straight-line distance to the target; admissible because road lengths
+    # are never shorter than the great-circle distance
+    def heuristic(node):
+        lat, lon = G.nodes[node]["y"], G.nodes[node]["x"]
+        return _haversine(lat, lon, target_lat, target_lon)
+
+    seeds = _source_seeds(H, chain_index, source)
+    goals = _target_goals(H, chain_index, target)
+
+    best = _same_chain_path(H, chain_index, source, target)
+    best_cost = best[0] if best else math.inf
+    best_anchor = None
+
+    dist = {}
+    parent = {}
+    queue = []
+    for anchor, (offset, _) in seeds.items():
+        dist[anchor] = offset
+        parent[anchor] = None
+        heapq.heappush(queue, (offset + heuristic(anchor), offset, anchor))
+
+    closed = set()
+    while queue:
+        f, g, u = heapq.heappop(queue)
+        if f >= best_cost:
+            break
+        if u in closed:
+            continue
+        closed.add(u)
+
+        if u in goals and g + goals[u][0] < best_cost:
+            best_cost = g + goals[u][0]
+            best_anchor = u
+
+        for v, keydict in H.succ[u].items():
+            if v in closed:
+                continue
+            key, data = min(keydict.items(), key=lambda item: item[1]["length"])
+            new_g = g + data["length"]
+            if new_g < dist.get(v, math.inf):
+                dist[v] = new_g
+                parent[v] = (u, key)
+                heapq.heappush(queue, (new_g + heuristic(v), new_g, v))
+
+    if best_anchor is None:
+        if best is None:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        return best
+
+    # Walk back over the shortcut edges and expand them to full node paths
+    legs = []
+    node = best_anchor
+    while parent[node] is not None:
+        u, key = parent[node]
+        legs.append(expand_edge(H, u, node, key))
+        node = u
+    path = list(seeds[node][1])
+    for leg in reversed(legs):
+        path.extend(leg)
+    path.extend(goals[best_anchor][1])
+    return best_cost, path
@@ -0,0 +1,159 @@
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class RouteBatcher:
+    """
+    Worker queue in front of the route handler logic.
+
+    Identical in-flight queries share one Future, and the snap lookups of all
+    queries arriving within `window_ms` of each other are resolved with a
+    single vectorized `snap_fn(X, Y)` call. A larger window batches more
+    requests per snap call (higher throughput) at the cost of added latency;
+    `window_ms=0` only batches requests that are already queued.
+    """
+
+    def __init__(self, snap_fn, route_fn, window_ms=5, max_batch=64, precision=6):
+        self.snap_fn = snap_fn
+        self.route_fn = route_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.precision = precision
+
+        self._queue = queue.Queue()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "snapped": 0}
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, origin_coords, destination_coords):
+        """Queue a (lat, lon) pair and return a Future resolving to route_fn's result."""
+        origin_coords = tuple(float(c) for c in origin_coords)
+        destination_coords = tuple(float(c) for c in destination_coords)
+        for lat, lon in (origin_coords, destination_coords):
+            if not (math.isfinite(lat) and math.isfinite(lon)):
+                raise ValueError(f"Invalid coordinates: ({lat}, {lon})")
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError(f"Coordinates out of range: ({lat}, {lon})")
+
+        key = (
+            round(origin_coords[0], self.precision),
+            round(origin_coords[1], self.precision),
+            round(destination_coords[0], self.precision),
+            round(destination_coords[1], self.precision),
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RouteBatcher is closed.")
+            self.stats["requests"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = Future()
+            self._in_flight[key] = future
+            # Queued under the lock so nothing lands behind close()'s sentinel
+            self._queue.put((key, future))
+        return future
+
+    def route(self, origin_coords, destination_coords, timeout=None):
+        """Blocking helper around submit()."""
+        return self.submit(origin_coords, destination_coords).result(timeout)
+
+    def close(self):
+        """Stop the worker thread once the queued requests are served."""
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+
+    def _collect_batch(self):
+        """Block for one request, then gather more until the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            try:
+                self._serve(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    for key, _ in batch:
+                        self._in_flight.pop(key, None)
+
+    def _serve(self, batch):
+        # Snap every distinct coordinate of the batch in one vectorized call
+        coords = sorted(
+            {(lat, lon) for key, _ in batch for lat, lon in (key[:2], key[2:])}
+        )
+        lats, lons = np.array(coords).T
+        try:
+            nodes = np.asarray(self.snap_fn(lons, lats)).tolist()
+            snapped = dict(zip(coords, nodes))
+        except Exception:
+            snapped = self._snap_each(coords)
+
+        self.stats["batches"] += 1
+        self.stats["snapped"] += len(coords)
+
+        # Different coordinates may snap to the same node pair
+        results = {}
+        for key, future in batch:
+            try:
+                pair = (self._node(snapped, key[:2]), self._node(snapped, key[2:]))
+                if pair not in results:
+                    results[pair] = self.route_fn(*pair)
+                future.set_result(results[pair])
+            except Exception as e:
+                future.set_exception(e)
+
+    def _snap_each(self, coords):
+        """Snap coordinates one by one, keeping the exception of any that fail."""
+        snapped = {}
+        for lat, lon in coords:
+            try:
+                snapped[lat, lon] = np.asarray(
+                    self.snap_fn(np.array([lon]), np.array([lat]))
+                ).tolist()[0]
+            except Exception as e:
+                snapped[lat, lon] = e
+        return snapped
+
+    @staticmethod
+    def _node(snapped, coords):
+        node = snapped[coords]
+        if isinstance(node, Exception):
+            raise node
+        return node
@@ -0,0 +1,226 @@
+import time
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+
+def distance_table(matrix, sources, chunk_size=16):
+    """
+    Compute the pairwise road distances between `sources` (row indices of
+    `matrix`) with batched Dijkstra runs.
+
+    Only the columns of the sources are kept from each chunk, so memory stays
+    at chunk_size x |V| while the searches run.
+    """
+    sources = np.asarray(sources)
+    table = np.empty((len(sources), len(sources)))
+    for start in range(0, len(sources), chunk_size):
+        chunk = sources[start : start + chunk_size]
+        dist = dijkstra(matrix, directed=True, indices=chunk)
+        table[start : start + len(chunk)] = dist[:, sources]
+    if np.isinf(table).any():
+        raise ValueError("Some stops cannot be reached from each other.")
+    return table
+
+
+def tour_length(tour, table):
+    """Length of the closed tour (returning to tour[0])."""
+    return float(table[tour, np.roll(tour, -1)].sum())
+
+
+def nearest_insertion(table):
+    """
+    Build a closed tour starting at index 0 by repeatedly inserting the stop
+    nearest to the tour at its cheapest position.
+    """
+    n = len(table)
+    tour = [0]
+    in_tour = np.zeros(n, dtype=bool)
+    in_tour[0] = True
+    # Seed from the legs leaving the depot only: open tours zero the legs
+    # back to it, which would make every stop look equally near
+    nearest = table[0].copy()
+    nearest[0] = np.inf
+
+    for _ in range(n - 1):
+        k = int(np.argmin(nearest))
+        current = np.array(tour)
+        following = np.roll(current, -1)
+        cost = table[current, k] + table[k, following] - table[current, following]
+        position = int(np.argmin(cost)) + 1
+        tour.insert(position, k)
+
+        in_tour[k] = True
+        nearest = np.minimum(nearest, np.minimum(table[k], table[:, k]))
+        nearest[in_tour] = np.inf
+    return tour
+
+
+def two_opt(tour, table, deadline):
+    """
+    Improve the tour by reversing segments until no reversal helps or the
+    deadline passes. Handles asymmetric tables by pricing the reversed segment
+    with prefix sums of the forward and backward leg costs.
+    """
+    tour = list(tour)
+    n = len(tour)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        order = np.array(tour + [tour[0]])
+        forward = np.concatenate(([0], np.cumsum(table[order[:-1], order[1:]])))
+        backward = np.concatenate(([0], np.cumsum(table[order[1:], order[:-1]])))
+
+        for i in range(1, n - 1):
+            a, t_i = order[i - 1], order[i]
+            j = np.arange(i + 1, n)
+            t_j, b = order[j], order[j + 1]
+            delta = (
+                table[a, t_j]
+                + table[t_i, b]
+                + (backward[j] - backward[i])
+                - table[a, t_i]
+                - table[t_j, b]
+                - (forward[j] - forward[i])
+            )
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = i + 1 + best
+                tour[i : j + 1] = reversed(tour[i : j + 1])
+                improved = True
+                break
+            if time.perf_counter() >= deadline:
+                break
+    return tour
+
+
+def or_opt(tour, table, deadline, max_segment=3):
+    """
+    Improve the tour by moving segments of up to `max_segment` consecutive
+    stops to their best position elsewhere in the tour.
+    """
+    tour = list(tour)
+    n = len(tour)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for length in range(1, max_segment + 1):
+            for i in range(1, n - length + 1):
+                segment = tour[i : i + length]
+                prev, nxt = tour[i - 1], tour[(i + length) % n]
+                removal_gain = (
+                    table[prev, segment[0]]
+                    + table[segment[-1], nxt]
+                    - table[prev, nxt]
+                )
+                rest = np.array(tour[:i] + tour[i + length :])
+                following = np.roll(rest, -1)
+                insertion_cost = (
+                    table[rest, segment[0]]
+                    + table[segment[-1], following]
+                    - table[rest, following]
+                )
+                position = int(np.argmin(insertion_cost))
+                if insertion_cost[position] < removal_gain - 1e-9:
+                    rest = rest.tolist()
+                    tour = rest[: position + 1] + segment + rest[position + 1 :]
+                    improved = True
+                    break
+                if time.perf_counter() >= deadline:
+                    return tour
+            if improved:
+                break
+    return tour
+
+
+def solve_tour(table, time_budget=1.0):
+    """
+    Order the stops of a distance table (index 0 is the depot) with nearest
+    insertion, then alternate 2-opt and Or-opt until neither improves the
+    tour or `time_budget` seconds have passed.
+
+    Returns the tour and the length right after construction.
+    """
+    deadline = time.perf_counter() + time_budget
+    tour = nearest_insertion(table)
+    initial_length = tour_length(tour, table)
+    if len(tour) < 4:
+        return tour, initial_length
+
+    while time.perf_counter() < deadline:
+        length = tour_length(tour, table)
+        tour = two_opt(tour, table, deadline)
+        tour = or_opt(tour, table, deadline)
+        if tour_length(tour, table) >= length - 1e-9:
+            break
+    return tour, initial_length
+
+
+def stitch_path(matrix, tour_rows, leg_lengths, nodes, chunk_size=16):
+    """
+    Concatenate the node paths of consecutive legs of the tour.
+
+    `tour_rows` are matrix rows in visiting order and `leg_lengths` the
+    table distance of each leg. The legs are searched again in chunks, each
+    bounded by its longest leg, and only their predecessor chains are kept.
+    """
+    path = [nodes[tour_rows[0]]]
+    legs = list(zip(tour_rows[:-1], tour_rows[1:]))
+    for start in range(0, len(legs), chunk_size):
+        chunk = legs[start : start + chunk_size]
+        limit = max(leg_lengths[start : start + chunk_size]) + 1e-6
+        _, predecessors = dijkstra(
+            matrix,
+            directed=True,
+            indices=[src for src, _ in chunk],
+            return_predecessors=True,
+            limit=limit,
+        )
+        for i, (src, dst) in enumerate(chunk):
+            leg = []
+            row = dst
+            while row != src:
+                leg.append(nodes[row])
+                row = predecessors[i, row]
+            path.extend(reversed(leg))
+    return path
+
+
+def optimize_route(
+    matrix, nodes, node_index, depot, stops, return_to_depot=True, time_budget=1.0
+):
+    """
+    Order `stops` (node ids) into a short tour starting at `depot`.
+
+    Returns a dict with the visiting order (indices into `stops`), the full
+    stitched node path, its length and timings of the table and solve steps.
+    `time_budget` only bounds the solve step; building the table and
+    stitching the path each cost one Dijkstra per stop on top of it.
+    """
+    rows = np.array([node_index[node] for node in [depot, *stops]])
+
+    start = time.perf_counter()
+    table = distance_table(matrix, rows)
+    table_time = time.perf_counter() - start
+
+    # An open tour is a closed one whose legs back to the depot are free
+    solve_table = table if return_to_depot else table.copy()
+    if not return_to_depot:
+        solve_table[:, 0] = 0
+
+    start = time.perf_counter()
+    tour, initial_length = solve_tour(solve_table, time_budget)
+    solve_time = time.perf_counter() - start
+
+    tour_sources = tour + [0] if return_to_depot else tour
+    leg_lengths = table[tour_sources[:-1], tour_sources[1:]]
+    length = float(leg_lengths.sum())
+
+    return {
+        "order": [i - 1 for i in tour[1:]],
+        "path": stitch_path(matrix, rows[tour_sources], leg_lengths, nodes),
+        "length": length,
+        "initial_length": initial_length,
+        "table_time": table_time,
+        "solve_time": solve_time,
+    }
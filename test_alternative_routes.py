@@ -0,0 +1,120 @@
+import random
+
+import networkx as nx
+import pytest
+
+from alternative_routes import alternative_routes
+from graph_preprocessing import _haversine, astar_route, build_csr, preprocess_graph
+
+STRETCH = 0.25
+MAX_SHARING = 0.8
+
+
+def grid_graph(seed, size=8):
+    """Two-way street grid whose edge lengths exceed straight-line distances."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    for i in range(size):
+        for j in range(size):
+            G.add_node(i * size + j, y=10.7 + i * 0.002, x=106.6 + j * 0.002)
+    for i in range(size):
+        for j in range(size):
+            u = i * size + j
+            for v in ([u + 1] if j + 1 < size else []) + (
+                [u + size] if i + 1 < size else []
+            ):
+                straight = _haversine(
+                    G.nodes[u]["y"], G.nodes[u]["x"], G.nodes[v]["y"], G.nodes[v]["x"]
+                )
+                G.add_edge(u, v, length=straight * rng.uniform(1.0, 1.3))
+                G.add_edge(v, u, length=straight * rng.uniform(1.0, 1.3))
+    return G
+
+
+def edge_length(G, u, v):
+    return min(data["length"] for data in G[u][v].values())
+
+
+def shared_length(G, first, second):
+    second_edges = set(zip(second[:-1], second[1:]))
+    return sum(
+        edge_length(G, u, v)
+        for u, v in zip(first[:-1], first[1:])
+        if (u, v) in second_edges
+    )
+
+
+@pytest.fixture(scope="module")
+def graphs():
+    result = []
+    for seed in range(5):
+        G, H, chain_index, _ = preprocess_graph(grid_graph(seed))
+        matrix, nodes, node_index = build_csr(G)
+        result.append((G, H, chain_index, matrix, matrix.T.tocsr(), nodes, node_index))
+    return result
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 5])
+def test_routes_are_valid_and_diverse(graphs, k):
+    for G, H, chain_index, matrix, reverse_matrix, nodes, node_index in graphs:
+        rng = random.Random(k)
+        for _ in range(10):
+            source, target = rng.sample(nodes, 2)
+            shortest_length, shortest_path = astar_route(
+                G, H, chain_index, source, target
+            )
+            routes = alternative_routes(
+                matrix,
+                reverse_matrix,
+                nodes,
+                node_index,
+                source,
+                target,
+                shortest_length,
+                k=k,
+                stretch=STRETCH,
+                max_sharing=MAX_SHARING,
+            )
+
+            assert 1 <= len(routes) <= k
+            assert routes[0]["length"] == pytest.approx(shortest_length)
+            assert nx.path_weight(
+                G, routes[0]["path"], weight="length"
+            ) == pytest.approx(nx.path_weight(G, shortest_path, weight="length"))
+
+            for route in routes:
+                path = route["path"]
+                assert path[0] == source and path[-1] == target
+                assert len(set(path)) == len(path)
+                assert nx.path_weight(G, path, weight="length") == pytest.approx(
+                    route["length"]
+                )
+                assert route["length"] <= (1 + STRETCH) * shortest_length + 1e-6
+
+            for i, first in enumerate(routes):
+                for second in routes[i + 1 :]:
+                    assert (
+                        shared_length(G, second["path"], first["path"])
+                        <= MAX_SHARING * shortest_length + 1e-6
+                    )
+
+
+def test_finds_alternatives_on_grid(graphs):
+    found = 0
+    for G, H, chain_index, matrix, reverse_matrix, nodes, node_index in graphs:
+        source, target = nodes[0], nodes[-1]
+        shortest_length, _ = astar_route(G, H, chain_index, source, target)
+        routes = alternative_routes(
+            matrix, reverse_matrix, nodes, node_index, source, target, shortest_length
+        )
+        found += len(routes) > 1
+    assert found > 0
+
+
+def test_source_equals_target(graphs):
+    G, H, chain_index, matrix, reverse_matrix, nodes, node_index = graphs[0]
+    node = nodes[10]
+    routes = alternative_routes(
+        matrix, reverse_matrix, nodes, node_index, node, node, 0, k=3
+    )
+    assert routes == [{"path": [node], "length": 0.0}]
@@ -0,0 +1,83 @@
+import random
+
+import networkx as nx
+import pytest
+
+from graph_preprocessing import astar_route, preprocess_graph
+
+
+def make_graph(edges, coords):
+    """Build a MultiDiGraph with x/y node coordinates and edge lengths."""
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    for node, (lat, lon) in coords.items():
+        G.add_node(node, y=lat, x=lon)
+    for u, v, length in edges:
+        G.add_edge(u, v, length=length)
+    return G
+
+
+def random_graph(seed, num_nodes=8, num_edges=10):
+    """Random road-like graph whose edge lengths exceed straight-line distances."""
+    rng = random.Random(seed)
+    coords = {
+        node: (10.7 + rng.random() * 0.01, 106.6 + rng.random() * 0.01)
+        for node in range(num_nodes)
+    }
+    edges = []
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_nodes), 2)
+        length = 2000 + rng.random() * 1000  # Longer than any straight line
+        edges.append((u, v, length))
+        if rng.random() < 0.6:
+            edges.append((v, u, length))
+    return make_graph(edges, coords)
+
+
+def assert_routes_match(G):
+    G, H, chain_index, _ = preprocess_graph(G)
+    for source in G.nodes:
+        for target in G.nodes:
+            length, path = astar_route(G, H, chain_index, source, target)
+            expected = nx.dijkstra_path_length(G, source, target, weight="length")
+            assert length == pytest.approx(expected)
+            assert path[0] == source and path[-1] == target
+            assert nx.path_weight(G, path, weight="length") == pytest.approx(expected)
+
+
+def test_loop_road_back_to_same_anchor():
+    # 12 -> 0 -> 4 -> 12 leaves and re-enters anchor 12
+    coords = {12: (10.70, 106.70), 0: (10.701, 106.70), 4: (10.701, 106.701)}
+    coords.update({1: (10.699, 106.70), 2: (10.70, 106.699)})
+    edges = [
+        (12, 0, 200),
+        (0, 4, 200),
+        (4, 12, 200),
+        (12, 1, 200),
+        (1, 12, 200),
+        (12, 2, 200),
+        (2, 12, 200),
+    ]
+    assert_routes_match(make_graph(edges, coords))
+
+
+def test_two_way_loop_road():
+    coords = {0: (10.70, 106.70), 1: (10.699, 106.70)}
+    coords.update({n: (10.70 + n * 0.0005, 106.701) for n in range(2, 6)})
+    edges = [(0, 1, 200), (1, 0, 200)]
+    ring = [0, 2, 3, 4, 5, 0]
+    for u, v in zip(ring[:-1], ring[1:]):
+        edges += [(u, v, 300), (v, u, 300)]
+    assert_routes_match(make_graph(edges, coords))
+
+
+def test_ring_of_chain_nodes():
+    coords = {n: (10.70, 106.70 + n * 0.001) for n in range(6)}
+    edges = []
+    for n in range(6):
+        edges += [(n, (n + 1) % 6, 200), ((n + 1) % 6, n, 200)]
+    assert_routes_match(make_graph(edges, coords))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_graphs(seed):
+    assert_routes_match(random_graph(seed))
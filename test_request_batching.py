@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from request_batching import RouteBatcher
+
+
+def snap(X, Y):
+    """Fake snapping that fails on negative longitudes like nearest_nodes on nulls."""
+    X = np.asarray(X)
+    if (X < 0).any():
+        raise ValueError("`X` and `Y` cannot contain nulls")
+    return np.round(X).astype(int)
+
+
+@pytest.mark.parametrize(
+    "coords", [[float("nan"), 106.7], [10.7, float("inf")], [91.0, 106.7]]
+)
+def test_submit_rejects_invalid_coordinates(coords):
+    batcher = RouteBatcher(snap, lambda u, v: (u, v))
+    with pytest.raises(ValueError):
+        batcher.submit(coords, [10.7, 106.7])
+    batcher.close()
+
+
+def test_failed_snap_only_fails_its_own_request():
+    batcher = RouteBatcher(snap, lambda u, v: (u, v), window_ms=50)
+    good = batcher.submit([10.7, 1.0], [10.7, 3.0])
+    bad = batcher.submit([10.7, -5.0], [10.7, 3.0])
+
+    assert good.result(timeout=5) == (1, 3)
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    batcher.close()
+
+
+def test_submit_after_close_raises():
+    batcher = RouteBatcher(snap, lambda u, v: (u, v))
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit([10.7, 1.0], [10.7, 3.0])
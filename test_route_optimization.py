@@ -0,0 +1,159 @@
+import itertools
+import random
+import time
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_preprocessing import build_csr
+from route_optimization import (
+    nearest_insertion,
+    optimize_route,
+    or_opt,
+    solve_tour,
+    tour_length,
+    two_opt,
+)
+
+
+def random_graph(seed, num_nodes=30, num_extra_edges=40):
+    """Strongly connected MultiDiGraph: a ring plus random one-way shortcuts."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph()
+    for u in range(num_nodes):
+        v = (u + 1) % num_nodes
+        G.add_edge(u, v, length=rng.uniform(50, 500))
+        G.add_edge(v, u, length=rng.uniform(50, 500))
+    for _ in range(num_extra_edges):
+        u, v = rng.sample(range(num_nodes), 2)
+        G.add_edge(u, v, length=rng.uniform(50, 500))
+    return G
+
+
+def random_table(seed, n):
+    """Asymmetric distance table with a zero diagonal."""
+    rng = np.random.default_rng(seed)
+    table = rng.uniform(1, 100, (n, n))
+    np.fill_diagonal(table, 0)
+    return table
+
+
+def brute_force_length(table):
+    return min(
+        tour_length([0, *order], table)
+        for order in itertools.permutations(range(1, len(table)))
+    )
+
+
+def open_table(table):
+    table = table.copy()
+    table[:, 0] = 0
+    return table
+
+
+def check_route(G, depot, stops, return_to_depot):
+    matrix, nodes, node_index = build_csr(G)
+    result = optimize_route(
+        matrix,
+        nodes,
+        node_index,
+        depot,
+        stops,
+        return_to_depot=return_to_depot,
+        time_budget=0.5,
+    )
+    path = result["path"]
+
+    assert sorted(result["order"]) == list(range(len(stops)))
+    assert nx.path_weight(G, path, weight="length") == pytest.approx(result["length"])
+    assert path[0] == depot
+    if return_to_depot:
+        assert path[-1] == depot
+    else:
+        assert path[-1] == stops[result["order"][-1]]
+
+    # Stops appear along the path in the reported order
+    position = 0
+    for i in result["order"]:
+        position = path.index(stops[i], position)
+    return result
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("return_to_depot", [True, False])
+def test_stitched_path_matches_length(seed, return_to_depot):
+    G = random_graph(seed)
+    rng = random.Random(seed)
+    depot, *stops = rng.sample(list(G.nodes), 9)
+    check_route(G, depot, stops, return_to_depot)
+
+
+@pytest.mark.parametrize("return_to_depot", [True, False])
+def test_duplicate_and_depot_stops(return_to_depot):
+    G = random_graph(0)
+    depot = 0
+    stops = [5, 12, 5, depot, 20, 12]
+    check_route(G, depot, stops, return_to_depot)
+
+
+@pytest.mark.parametrize("return_to_depot", [True, False])
+def test_single_stop(return_to_depot):
+    G = random_graph(1)
+    result = check_route(G, 0, [15], return_to_depot)
+    assert result["order"] == [0]
+
+
+@pytest.mark.parametrize("seed", range(100))
+@pytest.mark.parametrize("open_tour", [False, True])
+def test_matches_brute_force_on_tiny_tables(seed, open_tour):
+    table = random_table(seed, 4)
+    if open_tour:
+        table = open_table(table)
+    tour, _ = solve_tour(table, time_budget=1.0)
+    assert sorted(tour) == list(range(4))
+    assert tour_length(tour, table) == pytest.approx(brute_force_length(table))
+
+
+@pytest.mark.parametrize("seed", range(50))
+@pytest.mark.parametrize("open_tour", [False, True])
+def test_never_worse_than_construction(seed, open_tour):
+    table = random_table(seed, 7)
+    if open_tour:
+        table = open_table(table)
+    tour, initial_length = solve_tour(table, time_budget=1.0)
+    assert initial_length == pytest.approx(tour_length(nearest_insertion(table), table))
+    assert brute_force_length(table) - 1e-9 <= tour_length(tour, table)
+    assert tour_length(tour, table) <= initial_length + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_two_opt_reaches_local_optimum_on_asymmetric_table(seed):
+    table = random_table(seed, 8)
+    start = [0, *np.random.default_rng(seed).permutation(range(1, 8)).tolist()]
+    tour = two_opt(start, table, time.perf_counter() + 5)
+    length = tour_length(tour, table)
+
+    assert sorted(tour) == list(range(8)) and tour[0] == 0
+    assert length <= tour_length(start, table) + 1e-9
+    for i in range(1, 8):
+        for j in range(i + 1, 8):
+            reversed_tour = tour[:i] + tour[i : j + 1][::-1] + tour[j + 1 :]
+            assert tour_length(reversed_tour, table) >= length - 1e-9
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_or_opt_reaches_local_optimum(seed):
+    table = random_table(seed, 8)
+    start = [0, *np.random.default_rng(seed).permutation(range(1, 8)).tolist()]
+    tour = or_opt(start, table, time.perf_counter() + 5)
+    length = tour_length(tour, table)
+
+    assert sorted(tour) == list(range(8)) and tour[0] == 0
+    for segment_length in range(1, 4):
+        for i in range(1, 8 - segment_length + 1):
+            segment = tour[i : i + segment_length]
+            rest = tour[:i] + tour[i + segment_length :]
+            for position in range(len(rest)):
+                moved = rest[: position + 1] + segment + rest[position + 1 :]
+                assert tour_length(moved, table) >= length - 1e-9